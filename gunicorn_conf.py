@@ -0,0 +1,16 @@
+"""
+Gunicorn settings for serving HabiTech in production:
+
+    gunicorn -c gunicorn_conf.py main:app
+"""
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = 4
+threads = 2
+
+# Import main.py once in the master. Importing it only reads the last published
+# result from disk (no network, no threads), so workers are forked right away and
+# share that payload and the compiled Numba kernel copy-on-write. Each worker starts
+# its own refresh thread on its first request.
+preload_app = True
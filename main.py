@@ -1,19 +1,335 @@
 import os
+# The HE5 files are only ever read, so HDF5's file locking is unnecessary.
+# Must be set before h5py is imported.
+os.environ.setdefault("HDF5_USE_FILE_LOCKING", "FALSE")
 from flask import Flask, render_template, abort
 import time
+import threading
+import hashlib
+import pickle
+import json
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
 
 # --- NECESSARY IMPORTS UNCOMMENTED FOR REAL DATA PROCESSING ---
 import earthaccess
-import xarray as xr
+import h5py
+from numba import njit
 import numpy as np
-# Added pandas as it is needed for the time coordinate assignment logic
-import pandas as pd
+import zarr
 
 # Initialize Flask App
 app = Flask(__name__, template_folder='templates')
 
 HIGH_RISK_THRESHOLD = 1.6e-9
 
+# How often the background thread re-runs the pipeline after a live result (6 hours)
+REFRESH_INTERVAL_SECONDS = 6 * 60 * 60
+# How soon the background thread retries after falling back to mock data (5 minutes)
+RETRY_INTERVAL_SECONDS = 5 * 60
+# How often the other processes check for a newly published result (30 seconds)
+LATEST_POLL_INTERVAL_SECONDS = 30
+
+# --- Mock Data Fallback (served while warming up or when live fetching fails) ---
+MOCK_DATA = {
+    "region_name": "Greater Los Angeles Area (Simulated)",
+    "analysis_date": "2024-10-01 (Simulated)",
+    "summary": "AI analysis highlights extreme Urban Heat Island effects and correlated pollution spikes near major transport hubs.",
+    "metrics": [
+        {"name": "Average Tropospheric NO2", "value": "5.50e+15", "unit": "moles/cm²", "interpretation": "Simulated high NO2 concentration reflecting heavy urban activity and traffic."},
+        {"name": "Average Land Surface Temperature (LST)", "value": "95.2°F", "unit": "Fahrenheit", "interpretation": "High LST suggests severe Urban Heat Island effect, necessitating green infrastructure interventions."},
+        {"name": "NDVI (Vegetation Index) Score", "value": "0.15", "unit": "Index (0-1)", "interpretation": "Extremely low score, indicating insufficient park coverage and tree canopy for heat mitigation."},
+        {"name": "Precipitation Anomaly", "value": "-3.2 inches", "unit": "Inches (vs historical avg)", "interpretation": "Significant long-term drought conditions confirmed by NASA's GRACE-FO data, critical water management required."},
+    ],
+    "recommendations": [
+        "Mandate reflective roofing materials across all new industrial development.",
+        "Implement a 'Cool Pavement' pilot program in high-LST residential zones.",
+        "Identify 50 acres for new urban agriculture and vertical farming projects to improve NDVI and air quality."
+    ]
+}
+
+# Latest payload computed by the background refresh thread; guarded by _DATA_LOCK
+_DATA = {"value": MOCK_DATA, "ready": False}
+_DATA_LOCK = threading.Lock()
+
+# Path of the tropospheric NO2 field inside the OMI L3 (OMNO2d) HE5 files
+NO2_DATASET_PATH = "HDFEOS/GRIDS/ColumnAmountNO2/Data Fields/ColumnAmountNO2Trop"
+
+# California bounding box used for both the search and the processing
+LON_MIN, LAT_MIN = -124.48, 32.53
+LON_MAX, LAT_MAX = -114.13, 42.01
+
+# OMI L3 Global Grid (0.25 degree resolution, 720x1440, starting at -90/-180).
+# The grid never changes, so the California BBOX is converted to index slices
+# (every cell overlapping the box) once at load time.
+GRID_RES = 0.25
+GRID_SHAPE = (720, 1440)
+LAT_SLICE = slice(int((LAT_MIN + 90) / GRID_RES), int((LAT_MAX + 90) / GRID_RES) + 1)
+LON_SLICE = slice(int((LON_MIN + 180) / GRID_RES), int((LON_MAX + 180) / GRID_RES) + 1)
+
+# On-disk cache for earthaccess search results, refreshed once a day
+CACHE_DIR = ".cache"
+SEARCH_CACHE_TTL_SECONDS = 24 * 60 * 60
+
+# Latest live result, written by whichever process ran the pipeline and read by all others
+LATEST_RESULT_PATH = os.path.join(CACHE_DIR, "latest.json")
+# Only the process holding this lock downloads, converts and computes; everyone else
+# (e.g. the other gunicorn workers) just loads LATEST_RESULT_PATH
+REFRESH_LOCK_PATH = os.path.join("tempo_data", ".refresh.lock")
+
+
+def _list_he5_files(data_dir="tempo_data"):
+    """
+    Returns the downloaded OMI L3 HE5 files in a single directory scan
+    (an empty list if the directory does not exist yet).
+    """
+    try:
+        with os.scandir(data_dir) as entries:
+            return [e.path for e in entries if e.name.startswith("OMI-Aura_L3") and e.name.endswith(".he5")]
+    except FileNotFoundError:
+        return []
+
+
+def _granule_file_names(granule):
+    """Returns the names of the HE5 files an earthaccess search result downloads to."""
+    return [os.path.basename(link) for link in granule.data_links() if link.endswith(".he5")]
+
+
+def _write_json_atomic(path, obj):
+    """
+    Writes `obj` as JSON to a temporary file next to `path` and renames it into
+    place, so concurrent readers never see a half-written file.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as fh:
+        json.dump(obj, fh)
+    os.replace(tmp_path, path)
+
+
+def _search_data_cached(short_name, temporal, bounding_box):
+    """
+    Wraps earthaccess.search_data(), pickling the results under CACHE_DIR keyed by
+    the query. Cached results are reused without a CMR round-trip while they are
+    younger than the TTL, or at any age once every granule in them is on disk.
+    If the search itself fails, stale cached results are used instead.
+    """
+    key = hashlib.sha1(repr((short_name, temporal, bounding_box)).encode()).hexdigest()
+    cache_path = os.path.join(CACHE_DIR, f"search_{key}.pkl")
+
+    cached = None
+    try:
+        with open(cache_path, "rb") as fh:
+            cached = pickle.load(fh)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        pass
+
+    if cached is not None:
+        fresh = time.time() - os.path.getmtime(cache_path) < SEARCH_CACHE_TTL_SECONDS
+        on_disk = {os.path.basename(f) for f in _list_he5_files()}
+        if fresh or all(set(_granule_file_names(g)) <= on_disk for g in cached):
+            return cached
+
+    try:
+        search_results = earthaccess.search_data(
+            short_name=short_name,
+            temporal=temporal,
+            bounding_box=bounding_box
+        )
+    except Exception as e:
+        if cached is None:
+            raise
+        print(f"CMR search failed ({e}); using the cached search results")
+        return cached
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(cache_path, "wb") as fh:
+        pickle.dump(search_results, fh)
+
+    return search_results
+
+
+def _read_one_file(path, out):
+    """
+    Reads the full ColumnAmountNO2Trop grid from one HE5 file into `out`
+    (a GRID_SHAPE view of the batch being converted) and returns the file's fill value.
+    """
+    with h5py.File(path, "r") as h:
+        dset = h[NO2_DATASET_PATH]
+        fill = dset.attrs.get("_FillValue", dset.fillvalue)
+        dset.read_direct(out)
+
+    return np.asarray(fill).item()
+
+
+# All downloaded days of ColumnAmountNO2Trop consolidated into one Zarr store
+# (time, lat, lon). Each HE5 file is converted once; afterwards the California
+# region for every day comes from a single lock-free chunked read.
+ZARR_STORE = os.path.join("tempo_data", "ColumnAmountNO2Trop.zarr")
+ZARR_CHUNKS = (32, 90, 180)
+
+
+def _file_signature(path):
+    """Returns the (mtime, size) pair used to detect a re-downloaded HE5 file."""
+    st = os.stat(path)
+    return [st.st_mtime, st.st_size]
+
+
+def _sync_zarr_store(files):
+    """
+    Appends any HE5 files not yet in ZARR_STORE, rewrites the row of any file whose
+    mtime or size changed since it was converted, and returns the store. The store's
+    attrs hold one {"name", "mtime", "size", "fill"} entry per time step.
+    """
+    z = zarr.open_array(ZARR_STORE, mode="a", shape=(0,) + GRID_SHAPE, chunks=ZARR_CHUNKS, dtype=np.float32)
+    rows = z.attrs.get("rows", [])
+
+    # The data append and the attrs update are separate writes. If a previous run
+    # died in between, rows no longer line up with the array, so start over.
+    if len(rows) != z.shape[0]:
+        print(f"{ZARR_STORE} has {z.shape[0]} time steps but {len(rows)} rows; rebuilding it...")
+        z = zarr.open_array(ZARR_STORE, mode="w", shape=(0,) + GRID_SHAPE, chunks=ZARR_CHUNKS, dtype=np.float32)
+        rows = []
+
+    position = {row["name"]: i for i, row in enumerate(rows)}
+
+    new_files = []
+    stale = []
+    for f in sorted(files):
+        i = position.get(os.path.basename(f))
+        if i is None:
+            new_files.append(f)
+        elif [rows[i]["mtime"], rows[i]["size"]] != _file_signature(f):
+            stale.append((i, f))
+
+    if not new_files and not stale:
+        return z
+
+    # Read sequentially: h5py runs every HDF5 call (including the read and filter
+    # decode) under its global lock, so a thread pool would not overlap any I/O
+    if stale:
+        print(f"Re-converting {len(stale)} changed HE5 files in {ZARR_STORE}...")
+        grid = np.empty(GRID_SHAPE, np.float32)
+        for i, f in stale:
+            # Record the signature before reading so a file changing mid-read is picked up next time
+            mtime, size = _file_signature(f)
+            fill = _read_one_file(f, grid)
+            z[i] = grid
+            rows[i] = {"name": os.path.basename(f), "mtime": mtime, "size": size, "fill": fill}
+
+    if new_files:
+        print(f"Converting {len(new_files)} HE5 files into {ZARR_STORE}...")
+        batch = np.empty((len(new_files),) + GRID_SHAPE, np.float32)
+        for f, out in zip(new_files, batch):
+            mtime, size = _file_signature(f)
+            fill = _read_one_file(f, out)
+            rows.append({"name": os.path.basename(f), "mtime": mtime, "size": size, "fill": fill})
+        z.append(batch, axis=0)
+
+    z.attrs["rows"] = rows
+    return z
+
+
+# Compiled ahead of first use: the explicit signature makes Numba build the kernel
+# at import (and cache=True stores the machine code on disk for later starts), so
+# no refresh pays JIT latency. C-contiguous FP32 inputs let LLVM emit SIMD loads.
+# Only reassociation/contraction are enabled so LLVM can vectorize the reduction;
+# full fastmath would assume no NaNs and drop the `v == v` check.
+# The stack is only ~30x39x42 values, so the loop stays single-threaded: a prange
+# would add threading overhead and start Numba's (not fork-safe) OpenMP pool.
+@njit(
+    "Tuple((float64, int64))(float32[:, :, ::1], float32[::1])",
+    fastmath={"reassoc", "contract"}, cache=True
+)
+def _masked_sum_count(a, fills):
+    """
+    Returns the (sum, count) of the valid values in the (time, lat, lon) stack `a`,
+    skipping each time step's fill value and NaNs in a single fused pass.
+    `a` is FP32; only the running sum is kept in FP64 for numerical stability.
+    """
+    s = np.float64(0.0)
+    c = 0
+    for t in range(a.shape[0]):
+        fill = fills[t]
+        for i in range(a.shape[1]):
+            for j in range(a.shape[2]):
+                v = a[t, i, j]
+                if v != fill and v == v:
+                    s += v
+                    c += 1
+    return s, c
+
+
+def _compute_mean_no2(files):
+    """
+    Returns the average ColumnAmountNO2Trop over the California BBOX across all files.
+    """
+    z = _sync_zarr_store(files)
+
+    # --- Read the California slice of every requested day in one (time, lat, lon) selection ---
+    rows = z.attrs["rows"]
+    position = {row["name"]: i for i, row in enumerate(rows)}
+    idx = [position[os.path.basename(f)] for f in files]
+    # Keep the bulk data in FP32 (as OMI stores it) even if the store was written as FP64
+    arr = z.oindex[idx, LAT_SLICE, LON_SLICE].astype(np.float32, copy=False)
+    fills = np.asarray([rows[i]["fill"] for i in idx], np.float32)
+
+    # Overall average for the entire period across space (lat, lon) and time
+    total, n = _masked_sum_count(arr, fills)
+
+    if n == 0:
+        raise ValueError("No valid NO2 pixels found in the California BBOX.")
+
+    return total / n
+
+
+def _build_live_payload(overall_mean_no2, analysis_date):
+    """
+    Builds the dashboard payload for a computed average NO2 value.
+    """
+    # Format the NO2 value for display (Scientific notation)
+    formatted_no2 = f"{overall_mean_no2:.2e}" 
+
+    # 6. RISK ASSESSMENT (NEW LOGIC)
+    if overall_mean_no2 >= HIGH_RISK_THRESHOLD:
+        risk_level = "HIGH RISK"
+        risk_color_hex = "#DC2626" # Tailwind Red-600
+        risk_interpretation = f"HIGH RISK: Concentration ({formatted_no2}) exceeds the threshold ({HIGH_RISK_THRESHOLD:.2e}), suggesting severe air quality stress from pollution."
+    else:
+        risk_level = "LOW/MODERATE RISK"
+        risk_color_hex = "#059669" # Tailwind Green-600
+        risk_interpretation = f"LOW/MODERATE RISK: Concentration ({formatted_no2}) is below the threshold, suggesting acceptable air quality for the period."
+
+    
+    # 7. RETURN REAL DATA STRUCTURE
+    real_data = {
+        "region_name": "Greater California Area (Live Earthdata)",
+        "analysis_date": f"{analysis_date} (Live)",
+        "summary": f"Live AI analysis confirms **{risk_level}** air quality risk. Based on OMI data, the average Tropospheric NO2 in the BBOX is **{formatted_no2} moles/cm²**.",
+        "metrics": [
+            {
+                "name": "Average Tropospheric NO2", 
+                "value": formatted_no2, 
+                "unit": "moles/cm²", 
+                "interpretation": risk_interpretation
+            },
+            {"name": "Data Source", "value": "NASA OMI/Aura", "unit": "Satellite", "interpretation": "Analysis using actual satellite data for the specified period."},
+        ],
+        "recommendations": [
+            "Implement dynamic traffic metering to reduce localized NO2 spikes.",
+            "Promote public transport usage during peak NO2 hours.",
+            "Review industrial emission standards in areas with peak NO2 readings."
+        ],
+        # --- FLAGS FOR UI CONTROL ---
+        "is_live_data": True, 
+        "risk_color_hex": risk_color_hex,
+        "risk_level": risk_level
+    }
+    
+    return real_data
+
 
 def fetch_california_data():
     """
@@ -25,37 +341,43 @@ def fetch_california_data():
     
     # --- Data Acquisition Logic (Real-World Implementation: OMI NO2) ---
     try:
-        # 1. AUTHENTICATION (Crucial step for NASA Data)
-        # You MUST run 'earthaccess.login()' once in your environment to save credentials
-        # earthaccess.login()
-        
         # 2. DEFINE THE AREA OF INTEREST (e.g., a bounding box for the LA area)
         # Define the region of interest (California bounding box used in processing)
-        earthaccess.login(strategy="environment")
-        lon_min, lat_min = -124.48, 32.53
-        lon_max, lat_max = -114.13, 42.01
-        BBOX = (lon_min, lat_min, lon_max, lat_max) # Defined as (west, south, east, north)
+        BBOX = (LON_MIN, LAT_MIN, LON_MAX, LAT_MAX) # Defined as (west, south, east, north)
         
         START_DATE = "2025-09-01"
         END_DATE = "2025-10-01"
         
         # 3. QUERY FOR A DATASET (Updated to OMI Tropospheric NO2)
-        # Concept ID for OMI-Aura_L3-OMNO2d (Daily Level 3 NO2)
-        search_results = earthaccess.search_data(
+        # Concept ID for OMI-Aura_L3-OMNO2d (Daily Level 3 NO2).
+        # Cached on disk, so this is no network round-trip within the TTL.
+        search_results = _search_data_cached(
             short_name="OMNO2d",
             temporal=(START_DATE, END_DATE),
             bounding_box=BBOX
         )
 
         print(len(search_results))
-        
-        # 4. DOWNLOAD THE DATA FILES
-        # This will download the HE5 files to your current working directory.
-        import glob
-        files = glob.glob("tempo_data/OMI-Aura_L3.*he5")
-        if not files:
-            earthaccess.download(search_results , "tempo_data")
-        files = glob.glob("tempo_data/OMI-Aura_L3*.he5")
+
+        # Only the granules the archive actually has are expected on disk, so a day
+        # missing upstream does not trigger a download on every refresh
+        on_disk = {os.path.basename(f) for f in _list_he5_files()}
+        expected_names = [name for g in search_results for name in _granule_file_names(g)]
+        missing = [g for g in search_results if not set(_granule_file_names(g)) <= on_disk]
+
+        # Skip the login and download entirely when every granule is already on disk
+        if missing:
+            # 1. AUTHENTICATION (Crucial step for NASA Data)
+            # You MUST run 'earthaccess.login()' once in your environment to save credentials
+            # earthaccess.login()
+            earthaccess.login(strategy="environment")
+
+            # 4. DOWNLOAD THE DATA FILES
+            # This will download the HE5 files to your current working directory.
+            earthaccess.download(missing , "tempo_data")
+            on_disk = {os.path.basename(f) for f in _list_he5_files()}
+
+        files = [os.path.join("tempo_data", name) for name in expected_names if name in on_disk]
         print(len(files))
         
         
@@ -71,125 +393,160 @@ def fetch_california_data():
 
         
         # 5. PROCESS THE HE5 FILES (The core of your NO2 processing)
-        print(f"Processing {len(files)} downloaded HE5 files...")
-
-        # --- Define Pre-processing Function (from user's code) ---
-        def preprocess_omi_l3(ds):
-            """
-            Standardizes the OMI L3 Dataset for concatenation by renaming dimensions 
-            and adding a placeholder time dimension, as the raw HE5 group output lacks them.
-            """
-            # Rename generic dimensions (720x1440 grid) to lat/lon
-            ds = ds.rename_dims({'phony_dim_0': 'lat', 'phony_dim_1': 'lon'})
-
-            # Drop the 'Weight' variable if it exists
-            if 'Weight' in ds:
-                ds = ds.drop_vars('Weight')
-
-            # Add a time dimension of size 1, required for concatenation
-            ds = ds.expand_dims(time=1)
-            return ds
-
-        # --- Open and Concatenate Files (from user's code) ---
-        # Note: We use the dynamic 'files' list returned by earthaccess.download
-        ds_combined = xr.open_mfdataset(
-            files,
-            engine="netcdf4",
-            # Specify the internal group containing the data fields
-            group="HDFEOS/GRIDS/ColumnAmountNO2/Data Fields",
-            preprocess=preprocess_omi_l3,
-            combine="nested",
-            concat_dim="time",
-            parallel=True
-        )
-
-        # OMI L3 Global Grid (0.25 degree resolution)
-        lat = np.linspace(-89.875, 89.875, 720) 
-        lon = np.linspace(-179.875, 179.875, 1440)
-
-        # Assign the spatial coordinates
-        ds_combined = ds_combined.assign_coords(lat=lat, lon=lon)
-
-        # Skip assigning specific dates, as xarray should infer time dimension 
-        # from the metadata or the order of files, which is sufficient for averaging.
-        
-        # --- Calculate Average NO2 for California Region (from user's code) ---
-        # Select the data for the California region using .sel()
-        ca_data = ds_combined.sel(
-            lon=slice(lon_min, lon_max), 
-            lat=slice(lat_min, lat_max)
-        )
+        # The result only depends on the file set and on what is reduced (region and field),
+        # so reuse the mean stored for that combination if present
+        key = hashlib.sha1(repr((
+            sorted((f, os.path.getmtime(f), os.path.getsize(f)) for f in files),
+            LAT_SLICE, LON_SLICE, NO2_DATASET_PATH,
+        )).encode()).hexdigest()
+        mean_cache_path = os.path.join(CACHE_DIR, f"mean_{key}.json")
 
-        # Calculate the overall average for the entire period across space (lat, lon) and time
-        # Use .compute() to force Dask to load and calculate the result
-        overall_mean_no2 = ca_data['ColumnAmountNO2Trop'].mean(dim=['lat', 'lon', 'time']).compute().item()
-        
-        # Format the NO2 value for display (Scientific notation)
-        formatted_no2 = f"{overall_mean_no2:.2e}" 
-
-        print(f"Successfully retrieved and calculated Average NO2: {formatted_no2} moles/cm^2")
-        
-# 6. RISK ASSESSMENT (NEW LOGIC)
-        if overall_mean_no2 >= HIGH_RISK_THRESHOLD:
-            risk_level = "HIGH RISK"
-            risk_color_hex = "#DC2626" # Tailwind Red-600
-            risk_interpretation = f"HIGH RISK: Concentration ({formatted_no2}) exceeds the threshold ({HIGH_RISK_THRESHOLD:.2e}), suggesting severe air quality stress from pollution."
+        if os.path.exists(mean_cache_path):
+            with open(mean_cache_path) as fh:
+                overall_mean_no2 = json.load(fh)["mean"]
         else:
-            risk_level = "LOW/MODERATE RISK"
-            risk_color_hex = "#059669" # Tailwind Green-600
-            risk_interpretation = f"LOW/MODERATE RISK: Concentration ({formatted_no2}) is below the threshold, suggesting acceptable air quality for the period."
+            print(f"Processing {len(files)} downloaded HE5 files...")
+            overall_mean_no2 = _compute_mean_no2(files)
 
+            _write_json_atomic(mean_cache_path, {"mean": overall_mean_no2})
         
-        # 7. RETURN REAL DATA STRUCTURE
-        real_data = {
-            "region_name": "Greater California Area (Live Earthdata)",
-            "analysis_date": f"{time.strftime('%Y-%m-%d')} (Live)",
-            "summary": f"Live AI analysis confirms **{risk_level}** air quality risk. Based on OMI data, the average Tropospheric NO2 in the BBOX is **{formatted_no2} moles/cm²**.",
-            "metrics": [
-                {
-                    "name": "Average Tropospheric NO2", 
-                    "value": formatted_no2, 
-                    "unit": "moles/cm²", 
-                    "interpretation": risk_interpretation
-                },
-                {"name": "Data Source", "value": "NASA OMI/Aura", "unit": "Satellite", "interpretation": "Analysis using actual satellite data for the specified period."},
-            ],
-            "recommendations": [
-                "Implement dynamic traffic metering to reduce localized NO2 spikes.",
-                "Promote public transport usage during peak NO2 hours.",
-                "Review industrial emission standards in areas with peak NO2 readings."
-            ],
-            # --- FLAGS FOR UI CONTROL ---
-            "is_live_data": True, 
-            "risk_color_hex": risk_color_hex,
-            "risk_level": risk_level
-        }
+        print(f"Successfully retrieved and calculated Average NO2: {overall_mean_no2:.2e} moles/cm^2")
         
-        return real_data
+        # Publish the result for the processes that do not run the pipeline themselves
+        analysis_date = time.strftime('%Y-%m-%d')
+        _write_json_atomic(LATEST_RESULT_PATH, {"mean": overall_mean_no2, "analysis_date": analysis_date})
+
+        return _build_live_payload(overall_mean_no2, analysis_date)
 
     except Exception as e:
         # This block runs if real data fetching fails (e.g., credentials missing, files not found)
         print(f"Using mock data due to error: {e}")
         
-        # --- Mock Data Fallback (Current Executable Code) ---
-        mock_data = {
-            "region_name": "Greater Los Angeles Area (Simulated)",
-            "analysis_date": "2024-10-01 (Simulated)",
-            "summary": "AI analysis highlights extreme Urban Heat Island effects and correlated pollution spikes near major transport hubs.",
-            "metrics": [
-                {"name": "Average Tropospheric NO2", "value": "5.50e+15", "unit": "moles/cm²", "interpretation": "Simulated high NO2 concentration reflecting heavy urban activity and traffic."},
-                {"name": "Average Land Surface Temperature (LST)", "value": "95.2°F", "unit": "Fahrenheit", "interpretation": "High LST suggests severe Urban Heat Island effect, necessitating green infrastructure interventions."},
-                {"name": "NDVI (Vegetation Index) Score", "value": "0.15", "unit": "Index (0-1)", "interpretation": "Extremely low score, indicating insufficient park coverage and tree canopy for heat mitigation."},
-                {"name": "Precipitation Anomaly", "value": "-3.2 inches", "unit": "Inches (vs historical avg)", "interpretation": "Significant long-term drought conditions confirmed by NASA's GRACE-FO data, critical water management required."},
-            ],
-            "recommendations": [
-                "Mandate reflective roofing materials across all new industrial development.",
-                "Implement a 'Cool Pavement' pilot program in high-LST residential zones.",
-                "Identify 50 acres for new urban agriculture and vertical farming projects to improve NDVI and air quality."
-            ]
-        }
-        
-        return mock_data
+        return MOCK_DATA
+
+def _load_latest_payload():
+    """
+    Returns the payload for the result in LATEST_RESULT_PATH, or None if no live
+    result has been written yet.
+    """
+    try:
+        with open(LATEST_RESULT_PATH) as fh:
+            latest = json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+    return _build_live_payload(latest["mean"], latest["analysis_date"])
+
+
+# st_mtime_ns of the LATEST_RESULT_PATH last loaded into _DATA
+_latest_mtime = None
+
+
+def _reload_latest_if_changed():
+    """
+    Loads LATEST_RESULT_PATH into _DATA if the writer published a new result since
+    the last call; otherwise this is a single os.stat.
+    """
+    global _latest_mtime
+    try:
+        mtime = os.stat(LATEST_RESULT_PATH).st_mtime_ns
+    except OSError:
+        mtime = None
+
+    if mtime is not None and mtime != _latest_mtime:
+        payload = _load_latest_payload()
+        if payload is not None:
+            _latest_mtime = mtime
+            with _DATA_LOCK:
+                _DATA["value"] = payload
+                _DATA["ready"] = True
+
+
+# Open handle on REFRESH_LOCK_PATH while this process is the writer
+_writer_lock = None
+
+
+def _is_writer():
+    """
+    Returns True if this process is (or now becomes) the single writer. The first
+    process to flock REFRESH_LOCK_PATH keeps the lock for its lifetime; the OS
+    releases it if that process dies, so another one can take over on its next refresh.
+    """
+    global _writer_lock
+    if _writer_lock is not None:
+        return True
+    if fcntl is None:
+        # No flock on Windows, where only the single-process dev server runs anyway
+        return True
+
+    os.makedirs(os.path.dirname(REFRESH_LOCK_PATH), exist_ok=True)
+    fh = open(REFRESH_LOCK_PATH, "a")
+    try:
+        fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        fh.close()
+        return False
+
+    _writer_lock = fh
+    return True
+
+
+def refresh_data():
+    """
+    Refreshes _DATA once. The writer process runs fetch_california_data(); every
+    other process only reloads the latest result the writer published. A failed
+    refresh keeps the last live payload. Returns the seconds until the next refresh.
+    """
+    if not _is_writer():
+        _reload_latest_if_changed()
+        return LATEST_POLL_INTERVAL_SECONDS
+
+    data = fetch_california_data()
+    is_live = bool(data.get("is_live_data"))
+
+    with _DATA_LOCK:
+        if is_live or not _DATA["ready"]:
+            _DATA["value"] = data
+            _DATA["ready"] = is_live
+
+    return REFRESH_INTERVAL_SECONDS if is_live else RETRY_INTERVAL_SECONDS
+
+
+def _refresh_loop():
+    """
+    Refreshes the data in the background forever so requests never block on the
+    earthaccess + HE5 processing pipeline.
+    """
+    while True:
+        time.sleep(refresh_data())
+
+
+# PID of the process whose refresh thread is running (threads do not survive a fork)
+_refresh_thread_pid = None
+_refresh_thread_lock = threading.Lock()
+
+
+def start_refresh_thread():
+    """Starts the background refresh thread, once per process."""
+    global _refresh_thread_pid
+    with _refresh_thread_lock:
+        if _refresh_thread_pid == os.getpid():
+            return
+        _refresh_thread_pid = os.getpid()
+        threading.Thread(target=_refresh_loop, daemon=True).start()
+
+
+# Start from the last published result (a local file read, no network), so the app,
+# and every worker forked from a gunicorn preload_app master, serves it immediately
+_reload_latest_if_changed()
+
+@app.before_request
+def _ensure_refresh_thread():
+    """
+    Starts the refresh thread in whichever process actually serves requests, so it
+    works the same under the dev server, its reloader, and any WSGI server or fork.
+    """
+    start_refresh_thread()
 
 @app.route('/')
 def home():
@@ -202,8 +559,9 @@ def california_model():
     Renders the detailed California data page after fetching data.
     """
     try:
-        # Fetch the data using the function, which handles real or mock retrieval
-        data = fetch_california_data()
+        # Read the latest payload from the background thread (mock data while warming up)
+        with _DATA_LOCK:
+            data = _DATA["value"]
         
         # Render the template and pass the data dictionary to it
         return render_template('california_data.html', data=data)
@@ -214,8 +572,8 @@ def california_model():
         abort(500) 
 
 
-import os
-os.environ
-app.run(debug=True, port=os.getenv("PORT", default=5000))
+# Development server only. In production run `gunicorn -c gunicorn_conf.py main:app`.
+if __name__ == "__main__":
+    app.run(debug=True, port=os.getenv("PORT", default=5000))
 
 
@@ -0,0 +1,95 @@
+"""
+Tests for the HE5 -> Zarr conversion and the Numba NO2 averaging kernel.
+"""
+import os
+
+import h5py
+import numpy as np
+import pytest
+import zarr
+
+import main
+
+FILL = np.float32(-1.2676506e30)
+
+
+def _write_he5(path, value):
+    """Writes a synthetic OMNO2d file whose whole NO2 grid is `value`."""
+    grid = np.full(main.GRID_SHAPE, value, np.float32)
+    with h5py.File(path, "w") as h:
+        dset = h.create_dataset(main.NO2_DATASET_PATH, data=grid)
+        dset.attrs["_FillValue"] = FILL
+    return str(path)
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """Points ZARR_STORE at a fresh location under tmp_path."""
+    path = str(tmp_path / "no2.zarr")
+    monkeypatch.setattr(main, "ZARR_STORE", path)
+    return path
+
+
+def test_masked_sum_count_skips_fill_and_nan():
+    a = np.array([[[1.0, FILL], [np.nan, 2.0]],
+                  [[3.0, 4.0], [-9.0, np.nan]]], np.float32)
+    fills = np.array([FILL, -9.0], np.float32)
+
+    total, n = main._masked_sum_count(a, fills)
+
+    assert n == 4
+    assert total == pytest.approx(10.0)
+
+
+def test_sync_appends_new_files(tmp_path, store):
+    first = _write_he5(tmp_path / "day1.he5", 1.0)
+    z = main._sync_zarr_store([first])
+    assert z.shape[0] == 1
+
+    second = _write_he5(tmp_path / "day2.he5", 2.0)
+    z = main._sync_zarr_store([first, second])
+
+    assert z.shape[0] == 2
+    assert [row["name"] for row in z.attrs["rows"]] == ["day1.he5", "day2.he5"]
+    assert z[1, 0, 0] == 2.0
+    assert z.attrs["rows"][1]["fill"] == FILL
+
+
+def test_sync_rewrites_changed_file(tmp_path, store):
+    files = [_write_he5(tmp_path / "day1.he5", 1.0), _write_he5(tmp_path / "day2.he5", 2.0)]
+    main._sync_zarr_store(files)
+
+    # Re-download day1 with new contents and a newer mtime
+    _write_he5(tmp_path / "day1.he5", 5.0)
+    st = os.stat(files[0])
+    os.utime(files[0], ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    z = main._sync_zarr_store(files)
+
+    assert z.shape[0] == 2
+    assert z[0, 0, 0] == 5.0
+    assert z[1, 0, 0] == 2.0
+    assert z.attrs["rows"][0]["mtime"] == os.stat(files[0]).st_mtime
+
+
+def test_sync_rebuilds_when_rows_do_not_match(tmp_path, store):
+    files = [_write_he5(tmp_path / "day1.he5", 1.0), _write_he5(tmp_path / "day2.he5", 2.0)]
+    main._sync_zarr_store(files)
+
+    # Simulate a run that died between appending the data and writing the rows
+    z = zarr.open_array(store, mode="a")
+    z.attrs["rows"] = z.attrs["rows"][:1]
+    z = main._sync_zarr_store(files)
+
+    assert z.shape[0] == len(z.attrs["rows"]) == 2
+    assert [z[i, 0, 0] for i in range(2)] == [1.0, 2.0]
+
+
+def test_oindex_selection_matches_kernel_signature(tmp_path, store):
+    files = [_write_he5(tmp_path / "day1.he5", 1.0), _write_he5(tmp_path / "day2.he5", 3.0)]
+    z = main._sync_zarr_store(files)
+
+    arr = z.oindex[[1, 0], main.LAT_SLICE, main.LON_SLICE].astype(np.float32, copy=False)
+
+    assert arr.dtype == np.float32
+    assert arr.flags.c_contiguous
+    assert main._compute_mean_no2(files) == pytest.approx(2.0)